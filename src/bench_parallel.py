@@ -0,0 +1,124 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Benchmark — serial loop vs. process-parallel pipeline (synthetic input, no camera)
+
+Feeds synthetic BGR frames (docs/assets/input.jpg, shifted per frame) through the full L8 frame path
+(cvtColor, resize, invoke, parse, draw, imencode) and reports end-to-end FPS
+for the serial loop and for the parallel pipeline with 1..max_workers workers.
+
+Usage:
+  python3 bench_parallel.py <model_edgetpu.tflite> [frames] [width] [height] [max_workers]
+
+Example:
+  python3 bench_parallel.py models/ssd_mobilenet_v2_coco_quant_postprocess_edgetpu.tflite 300 640 480 4
+"""
+from __future__ import annotations
+import os, sys, time
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+import multiprocessing as mp
+import numpy as np
+
+from tpu_parallel import ParallelPipeline
+
+THRESH = 0.5
+N_SYNTHETIC = 8  # distinct frames, cycled
+SAMPLE_IMAGE = Path(__file__).resolve().parent.parent / "docs" / "assets" / "input.jpg"
+
+def synthetic_frames(w: int, h: int):
+    """Camera-like frames: the sample image (or a smooth gradient) shifted a few pixels per frame.
+    Not random noise, which is the worst case for imencode and would inflate post-processing cost."""
+    import cv2
+    base = cv2.imread(str(SAMPLE_IMAGE))
+    if base is None:
+        gx = np.linspace(0, 255, w, dtype=np.float32)[None, :]
+        gy = np.linspace(0, 255, h, dtype=np.float32)[:, None]
+        base = np.stack([np.broadcast_to(gx, (h, w)), np.broadcast_to(gy, (h, w)),
+                         (gx + gy) / 2], axis=-1).astype(np.uint8)
+    base = cv2.resize(base, (w, h), interpolation=cv2.INTER_AREA)
+    return [np.ascontiguousarray(np.roll(base, i * 4, axis=1)) for i in range(N_SYNTHETIC)]
+
+def bench_serial(model_path: str, n: int, w: int, h: int):
+    """Same per-frame work as stream_people_tpu_mjpeg.gen(). Runs in its own process."""
+    import cv2
+    from tpu_common import make_interpreter, set_input, get_detections, count_people, draw_boxes_bgr
+
+    cv2.setNumThreads(1)  # single-core baseline, like each pipeline worker
+
+    interp = make_interpreter(model_path)
+    _, ih, iw, _ = interp.get_input_details()[0]["shape"]
+    frames = synthetic_frames(w, h)
+
+    # Warm-up: the first invoke() uploads the model to the EdgeTPU (same as bench_parallel).
+    rgb = cv2.cvtColor(frames[0], cv2.COLOR_BGR2RGB)
+    set_input(interp, cv2.resize(rgb, (iw, ih), interpolation=cv2.INTER_LINEAR))
+    interp.invoke()
+
+    infer_ms_acc = 0.0
+    t_start = time.time()
+    for i in range(n):
+        frame = frames[i % N_SYNTHETIC].copy()
+        rgb = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
+        rgb_resized = cv2.resize(rgb, (iw, ih), interpolation=cv2.INTER_LINEAR)
+        set_input(interp, rgb_resized)
+        t0 = time.time()
+        interp.invoke()
+        infer_ms_acc += (time.time() - t0) * 1000.0
+        dets = get_detections(interp, score_thresh=THRESH)
+        people = count_people(dets, person_class=0)
+        draw_boxes_bgr(frame, dets, THRESH, person_class=0)
+        cv2.putText(frame, f"people:{people}", (10, 24), cv2.FONT_HERSHEY_SIMPLEX, 0.7, (0,255,0), 2)
+        cv2.imencode(".jpg", frame, [int(cv2.IMWRITE_JPEG_QUALITY), 80])
+    elapsed = time.time() - t_start
+    return n / elapsed, infer_ms_acc / n
+
+def bench_parallel(model_path: str, n: int, w: int, h: int, workers: int):
+    frames = synthetic_frames(w, h)
+    with ParallelPipeline(model_path, w, h, thresh=THRESH, workers=workers) as pipe:
+        # Warm-up: first invoke and worker imports are not part of steady state.
+        pipe.submit(frames[0])
+        pipe.get()
+
+        submitted = done = 0
+        infer_ms_acc = 0.0
+        t_start = time.time()
+        while done < n:
+            while pipe.free_slots() and submitted < n:
+                pipe.submit(frames[submitted % N_SYNTHETIC])
+                submitted += 1
+            infer_ms_acc += pipe.get().infer_ms
+            done += 1
+        elapsed = time.time() - t_start
+    return n / elapsed, infer_ms_acc / n
+
+def main():
+    if len(sys.argv) < 2:
+        print(__doc__.strip())
+        sys.exit(2)
+
+    model_path = sys.argv[1]
+    n = int(sys.argv[2]) if len(sys.argv) >= 3 else 300
+    w = int(sys.argv[3]) if len(sys.argv) >= 4 else 640
+    h = int(sys.argv[4]) if len(sys.argv) >= 5 else 480
+    max_workers = int(sys.argv[5]) if len(sys.argv) >= 6 else min(4, os.cpu_count() or 1)
+
+    if not Path(model_path).exists():
+        raise SystemExit(f"Model not found: {model_path}")
+
+    print(f"MODEL: {model_path}")
+    print(f"frames: {n}  synthetic: {w}x{h}  cpu_count: {os.cpu_count()}")
+    print()
+    print(f"{'mode':<10} {'workers':>7} {'FPS':>7} {'speedup':>8} {'tpu ms':>7}")
+
+    # Serial run in a child process so the EdgeTPU is released before the pipeline opens it.
+    with ProcessPoolExecutor(max_workers=1, mp_context=mp.get_context("spawn")) as ex:
+        base_fps, base_inf = ex.submit(bench_serial, model_path, n, w, h).result()
+    print(f"{'serial':<10} {'-':>7} {base_fps:7.1f} {1.0:7.2f}x {base_inf:7.1f}")
+
+    for workers in range(1, max_workers + 1):
+        fps, inf = bench_parallel(model_path, n, w, h, workers)
+        print(f"{'parallel':<10} {workers:>7} {fps:7.1f} {fps / base_fps:7.2f}x {inf:7.1f}")
+
+if __name__ == "__main__":
+    main()
@@ -8,21 +8,26 @@ Endpoints:
   /video   - MJPEG stream
 
 Usage:
-  python3 stream_people_tpu_mjpeg.py <model_edgetpu.tflite> <cam_index> [score_thresh] [width] [height] [port]
+  python3 stream_people_tpu_mjpeg.py <model_edgetpu.tflite> <cam_index> [score_thresh] [width] [height] [port] [workers]
+
+  workers: 0 = serial (default). N >= 1 = run pre/post-processing in N worker
+           processes (see tpu_parallel.py); the TPU process only does invoke().
 """
 from __future__ import annotations
-import sys, time
+import sys, time, threading
 from pathlib import Path
 import cv2
 from flask import Flask, Response
 
 from tpu_common import make_interpreter, set_input, get_detections, count_people, draw_boxes_bgr
+from tpu_parallel import ParallelPipeline
 
 app = Flask(__name__)
 
 STATE = {
     "cap": None,
     "interp": None,
+    "pipeline": None,
     "thresh": 0.5,
     "cam_index": 0,
     "cap_w": 640,
@@ -34,23 +39,37 @@ STATE = {
     "fps": 0.0,
 }
 
-def init(model_path: str, cam_index: int, thresh: float, cap_w: int, cap_h: int):
+# Every /video client runs its own generator; the pipeline is shared and not thread-safe.
+PIPELINE_LOCK = threading.Lock()
+
+def init(model_path: str, cam_index: int, thresh: float, cap_w: int, cap_h: int, workers: int = 0):
     if not Path(model_path).exists():
         raise SystemExit(f"Model not found: {model_path}")
 
-    interp = make_interpreter(model_path)
-    in_detail = interp.get_input_details()[0]
-    _, ih, iw, _ = in_detail["shape"]
-
     cap = cv2.VideoCapture(cam_index)
     cap.set(cv2.CAP_PROP_FRAME_WIDTH, cap_w)
     cap.set(cv2.CAP_PROP_FRAME_HEIGHT, cap_h)
     if not cap.isOpened():
         raise SystemExit(f"Cannot open camera index {cam_index}")
 
+    interp = pipeline = None
+    if workers > 0:
+        # Shared-memory slots need the real frame size (the camera may ignore cap.set).
+        ok, frame = cap.read()
+        if not ok or frame is None:
+            raise SystemExit(f"Cannot read from camera index {cam_index}")
+        cap_h, cap_w = frame.shape[:2]
+        pipeline = ParallelPipeline(model_path, cap_w, cap_h, thresh=thresh, workers=workers)
+        iw, ih = pipeline.in_w, pipeline.in_h
+    else:
+        interp = make_interpreter(model_path)
+        in_detail = interp.get_input_details()[0]
+        _, ih, iw, _ = in_detail["shape"]
+
     STATE.update({
         "cap": cap,
         "interp": interp,
+        "pipeline": pipeline,
         "thresh": thresh,
         "cam_index": cam_index,
         "cap_w": cap_w,
@@ -60,6 +79,10 @@ def init(model_path: str, cam_index: int, thresh: float, cap_w: int, cap_h: int)
     })
 
 def gen():
+    if STATE["pipeline"] is not None:
+        yield from gen_parallel()
+        return
+
     last_t = time.time()
     frames = 0
     while True:
@@ -99,6 +122,42 @@ def gen():
         yield (b"--frame\r\n"
                b"Content-Type: image/jpeg\r\n\r\n" + jpg.tobytes() + b"\r\n")
 
+def gen_parallel():
+    pipe = STATE["pipeline"]
+    with PIPELINE_LOCK:
+        # Drop frames left in flight by a previous client; they may be old.
+        while pipe.in_flight():
+            pipe.get()
+    last_t = time.time()
+    frames = 0
+    while True:
+        with PIPELINE_LOCK:
+            # Keep every slot busy so the workers and the TPU overlap.
+            while pipe.free_slots():
+                ok, frame = STATE["cap"].read()
+                if not ok or frame is None:
+                    time.sleep(0.01)
+                    break
+                pipe.submit(frame, fps=STATE["fps"])
+            if pipe.in_flight() == 0:
+                continue
+
+            res = pipe.get()
+        STATE["last_people"] = res.people
+        STATE["last_infer_ms"] = res.infer_ms
+        if res.jpg is None:
+            continue
+
+        frames += 1
+        now = time.time()
+        if now - last_t >= 1.0:
+            STATE["fps"] = frames / (now - last_t)
+            frames = 0
+            last_t = now
+
+        yield (b"--frame\r\n"
+               b"Content-Type: image/jpeg\r\n\r\n" + res.jpg + b"\r\n")
+
 @app.route("/")
 def index():
     return """<!doctype html>
@@ -126,11 +185,18 @@ def main():
     w = int(sys.argv[4]) if len(sys.argv) >= 5 else 640
     h = int(sys.argv[5]) if len(sys.argv) >= 6 else 480
     port = int(sys.argv[6]) if len(sys.argv) >= 7 else 8080
+    workers = int(sys.argv[7]) if len(sys.argv) >= 8 else 0
 
-    init(model_path, cam_index, thresh, w, h)
+    init(model_path, cam_index, thresh, w, h, workers)
     print(f"Starting MJPEG stream on 0.0.0.0:{port}")
     print(f"Open: http://<PI-IP>:{port}/")
-    app.run(host="0.0.0.0", port=port, debug=False, threaded=True)
+    if workers > 0:
+        print(f"Parallel mode: {workers} worker processes + 1 TPU process")
+    try:
+        app.run(host="0.0.0.0", port=port, debug=False, threaded=True)
+    finally:
+        if STATE["pipeline"] is not None:
+            STATE["pipeline"].close()
 
 if __name__ == "__main__":
     main()
@@ -70,7 +70,11 @@ def get_detections(interp: Interpreter, score_thresh: float = 0.5, top_k: int =
     """Heuristic SSD output parsing (works with common Mobilenet-SSD postprocess models)."""
     out_details = interp.get_output_details()
     outs = [interp.get_tensor(d["index"]) for d in out_details]
+    return parse_detections(outs, out_details, score_thresh=score_thresh, top_k=top_k)
 
+def parse_detections(outs: List[np.ndarray], out_details: List[Dict[str, Any]],
+                     score_thresh: float = 0.5, top_k: int = 50) -> List[Detection]:
+    """Same as get_detections(), but on raw output tensors (no interpreter needed, e.g. in a worker process)."""
     def squeeze(a):
         a = np.array(a)
         if a.ndim >= 2 and a.shape[0] == 1:
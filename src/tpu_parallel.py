@@ -0,0 +1,270 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Process-parallel pipeline for Coral EdgeTPU person detection.
+
+The serial loop (L7/L8) runs cvtColor, resize, SSD parsing, box drawing and
+JPEG encoding on one thread, so only one CPU core is busy. This module spreads
+that CPU work across a pool of worker processes (no GIL):
+
+  main   : copy camera frame into a shared-memory slot -> submit(seq)
+  worker : "pre"  BGR->RGB + resize into the slot's input buffer
+  TPU    : set_input + invoke() + copy output tensors (nothing else)
+  worker : "post" parse detections + draw + overlay + imencode
+  main   : get() returns results in sequence order
+
+Frames and model inputs never go through pickling; only slot numbers and the
+small SSD output tensors travel on the queues.
+"""
+
+from __future__ import annotations
+from dataclasses import dataclass
+from typing import Any, Dict, List, Optional, Tuple
+import multiprocessing as mp
+from multiprocessing import shared_memory
+import queue
+import signal
+import time
+import traceback
+import numpy as np
+
+# spawn: children never inherit the parent's camera / USB / Flask threads.
+_MP = mp.get_context("spawn")
+
+@dataclass
+class FrameResult:
+    seq: int
+    jpg: Optional[bytes]  # None if imencode failed
+    people: int
+    infer_ms: float
+
+def _attach(name: str, shape: Tuple[int, ...]) -> Tuple[shared_memory.SharedMemory, np.ndarray]:
+    shm = shared_memory.SharedMemory(name=name)
+    return shm, np.ndarray(shape, dtype=np.uint8, buffer=shm.buf)
+
+def _tpu_main(model_path: str, tpu_q, tasks, results, ready) -> None:
+    """TPU-owning process: only set_input / invoke / get_tensor."""
+    # Ctrl+C reaches the whole process group; shutdown is driven by close() instead.
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+    from tpu_common import make_interpreter, set_input
+
+    try:
+        interp = make_interpreter(model_path)
+    except Exception as e:
+        ready.put(("error", str(e)))
+        return
+    in_detail = interp.get_input_details()[0]
+    _, ih, iw, _ = in_detail["shape"]
+    out_details = interp.get_output_details()
+    ready.put(("ok", int(iw), int(ih), out_details))
+
+    # First message is the shared input buffer (created once the input size is known).
+    inputs_name, inputs_shape = tpu_q.get()
+    shm, inputs = _attach(inputs_name, inputs_shape)
+    try:
+        while True:
+            item = tpu_q.get()
+            if item is None:
+                break
+            seq, slot, fps = item
+            try:
+                set_input(interp, inputs[slot])
+                t0 = time.time()
+                interp.invoke()
+                infer_ms = (time.time() - t0) * 1000.0
+                outs = [interp.get_tensor(d["index"]).copy() for d in out_details]
+                tasks.put(("post", seq, slot, fps, outs, infer_ms))
+            except Exception:
+                results.put((seq, slot, None, 0, 0.0, traceback.format_exc()))
+    finally:
+        del inputs
+        shm.close()
+
+def _worker_main(cfg: Dict[str, Any], tasks, tpu_q, results) -> None:
+    """CPU worker: pre-processing and post-processing of frames in shared memory."""
+    signal.signal(signal.SIGINT, signal.SIG_IGN)  # see _tpu_main
+    import cv2
+    from tpu_common import parse_detections, count_people, draw_boxes_bgr
+
+    cv2.setNumThreads(1)  # one core per worker; scaling comes from the pool size
+
+    frames_shm, frames = _attach(cfg["frames_name"], cfg["frames_shape"])
+    inputs_shm, inputs = _attach(cfg["inputs_name"], cfg["inputs_shape"])
+    thresh = cfg["thresh"]
+    person_class = cfg["person_class"]
+    encode_params = [int(cv2.IMWRITE_JPEG_QUALITY), cfg["jpeg_quality"]]
+    try:
+        while True:
+            task = tasks.get()
+            if task is None:
+                break
+            seq, slot = task[1], task[2]
+            try:
+                if task[0] == "pre":
+                    fps = task[3]
+                    rgb = cv2.cvtColor(frames[slot], cv2.COLOR_BGR2RGB)
+                    inputs[slot] = cv2.resize(rgb, (cfg["in_w"], cfg["in_h"]), interpolation=cv2.INTER_LINEAR)
+                    tpu_q.put((seq, slot, fps))
+                else:
+                    _, _, _, fps, outs, infer_ms = task
+                    dets = parse_detections(outs, cfg["out_details"], score_thresh=thresh)
+                    people = count_people(dets, person_class=person_class)
+                    frame = frames[slot]
+                    draw_boxes_bgr(frame, dets, thresh, person_class=person_class)
+                    cv2.putText(frame, f"people:{people}  tpu:{infer_ms:.1f}ms  fps:{fps:.1f}", (10, 24),
+                                cv2.FONT_HERSHEY_SIMPLEX, 0.7, (0,255,0), 2)
+                    ok, jpg = cv2.imencode(".jpg", frame, encode_params)
+                    results.put((seq, slot, jpg.tobytes() if ok else None, people, infer_ms, None))
+            except Exception:
+                results.put((seq, slot, None, 0, 0.0, traceback.format_exc()))
+    finally:
+        del frames, inputs
+        frames_shm.close()
+        inputs_shm.close()
+
+class ParallelPipeline:
+    """
+    Frames in, in-order JPEG results out.
+
+    Usage:
+      with ParallelPipeline(model, 640, 480, workers=3) as pipe:
+          while pipe.free_slots():
+              pipe.submit(frame_bgr)
+          res = pipe.get()
+    """
+
+    def __init__(self, model_path: str, frame_w: int, frame_h: int, thresh: float = 0.5,
+                 workers: int = 2, person_class: int = 0, jpeg_quality: int = 80,
+                 slots: Optional[int] = None):
+        if workers < 1:
+            raise ValueError("workers must be >= 1")
+        self.workers = workers
+        self.slots = slots or workers * 2 + 2
+        self.frame_shape = (int(frame_h), int(frame_w), 3)
+
+        self._tasks = _MP.Queue()
+        self._tpu_q = _MP.Queue()
+        self._results = _MP.Queue()
+        self._procs: List[mp.Process] = []
+        self._shms: List[shared_memory.SharedMemory] = []
+
+        ready = _MP.Queue()
+        tpu = _MP.Process(target=_tpu_main, args=(model_path, self._tpu_q, self._tasks, self._results, ready),
+                          name="tpu", daemon=True)
+        tpu.start()
+        self._procs.append(tpu)
+        msg = None
+        while msg is None:
+            try:
+                msg = ready.get(timeout=1.0)
+            except queue.Empty:
+                if not tpu.is_alive():
+                    msg = ("error", f"exited with code {tpu.exitcode}")
+        if msg[0] != "ok":
+            self.close()
+            raise RuntimeError(f"TPU process failed: {msg[1]}")
+        _, self.in_w, self.in_h, out_details = msg
+
+        try:
+            frames_shape = (self.slots,) + self.frame_shape
+            inputs_shape = (self.slots, self.in_h, self.in_w, 3)
+            frames_shm = self._alloc(frames_shape)
+            inputs_shm = self._alloc(inputs_shape)
+            self._frames = np.ndarray(frames_shape, dtype=np.uint8, buffer=frames_shm.buf)
+            self._tpu_q.put((inputs_shm.name, inputs_shape))
+
+            cfg = {
+                "frames_name": frames_shm.name,
+                "frames_shape": frames_shape,
+                "inputs_name": inputs_shm.name,
+                "inputs_shape": inputs_shape,
+                "in_w": self.in_w,
+                "in_h": self.in_h,
+                "out_details": out_details,
+                "thresh": float(thresh),
+                "person_class": person_class,
+                "jpeg_quality": int(jpeg_quality),
+            }
+            for i in range(workers):
+                p = _MP.Process(target=_worker_main, args=(cfg, self._tasks, self._tpu_q, self._results),
+                                name=f"worker-{i}", daemon=True)
+                p.start()
+                self._procs.append(p)
+        except Exception:
+            self.close()
+            raise
+
+        self._free = list(range(self.slots))
+        self._next_submit = 0
+        self._next_out = 0
+        self._done: Dict[int, Tuple[int, FrameResult, Optional[str]]] = {}
+
+    def _alloc(self, shape: Tuple[int, ...]) -> shared_memory.SharedMemory:
+        shm = shared_memory.SharedMemory(create=True, size=int(np.prod(shape)))
+        self._shms.append(shm)
+        return shm
+
+    def free_slots(self) -> int:
+        return len(self._free)
+
+    def in_flight(self) -> int:
+        return self._next_submit - self._next_out
+
+    def submit(self, frame_bgr: np.ndarray, fps: float = 0.0) -> int:
+        """Copy frame into a free slot and queue it. Returns its sequence number."""
+        if not self._free:
+            raise RuntimeError("No free slot; call get() first")
+        if frame_bgr.shape != self.frame_shape:
+            raise ValueError(f"Frame shape {frame_bgr.shape} != pipeline frame shape {self.frame_shape}")
+        slot = self._free.pop()
+        self._frames[slot] = frame_bgr
+        seq = self._next_submit
+        self._next_submit += 1
+        self._tasks.put(("pre", seq, slot, float(fps)))
+        return seq
+
+    def get(self, timeout: Optional[float] = None) -> FrameResult:
+        """Next result in submit order (blocks). Raises queue.Empty on timeout."""
+        if self.in_flight() == 0:
+            raise RuntimeError("No frames in flight")
+        deadline = None if timeout is None else time.time() + timeout
+        while self._next_out not in self._done:
+            # Short waits so a dead child (USB drop, segfault, OOM) is reported instead of hanging.
+            wait = 1.0 if deadline is None else min(1.0, max(0.0, deadline - time.time()))
+            try:
+                seq, slot, jpg, people, infer_ms, err = self._results.get(timeout=wait)
+            except queue.Empty:
+                for p in self._procs:
+                    if not p.is_alive():
+                        raise RuntimeError(f"Pipeline process '{p.name}' exited with code {p.exitcode}")
+                if deadline is not None and time.time() >= deadline:
+                    raise
+                continue
+            self._done[seq] = (slot, FrameResult(seq, jpg, people, infer_ms), err)
+        slot, res, err = self._done.pop(self._next_out)
+        self._free.append(slot)
+        self._next_out += 1
+        if err:
+            raise RuntimeError(f"Pipeline failed on frame {res.seq}:\n{err}")
+        return res
+
+    def close(self) -> None:
+        self._tpu_q.put(None)
+        for _ in range(len(self._procs) - 1):
+            self._tasks.put(None)
+        for p in self._procs:
+            p.join(timeout=2.0)
+            if p.is_alive():
+                p.terminate()
+        self._procs = []
+        self._frames = None
+        for shm in self._shms:
+            shm.close()
+            shm.unlink()
+        self._shms = []
+
+    def __enter__(self) -> "ParallelPipeline":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()